@@ -0,0 +1,32 @@
+import logging
+
+from celery import shared_task
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def ingest_docx(path, model_label, importer_path):
+    """
+    Run the DOCX-to-database import outside the web request.
+
+    Args:
+        path (str):
+            Storage path of the uploaded DOCX file.
+        model_label (str):
+            'app_label.ModelName' of the model to import into.
+        importer_path (str):
+            Dotted path of the DocxToDB subclass to run.
+    """
+    model_class = apps.get_model(model_label)
+    importer = import_string(importer_path)
+
+    logger.info(f"Ingest task started for {model_label} from {path}")
+    try:
+        with default_storage.open(path, 'rb') as docx_file:
+            importer(docx_file, model_class).run()
+    finally:
+        default_storage.delete(path)
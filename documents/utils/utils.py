@@ -1,20 +1,41 @@
 import csv
+import io
 import logging
 import os
-import tempfile
-import time
+from concurrent.futures import ThreadPoolExecutor
 
-import pandas as pd
 from django.contrib import admin, messages
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
 from django.shortcuts import redirect
 from django.urls import path
 from django.utils.translation import gettext as _
 from docx import Document
+from lxml import etree
+
+from documents.tasks import ingest_docx
 
 # from documents.utils.additional_utils import MkbRubricsParser
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename='utils.log',
-                    filemode='a')
+# A module logger instead of logging.basicConfig: reconfiguring the root
+# logger from app code would leak into the rest of the Django project.
+logger = logging.getLogger(__name__)
+_handler = logging.FileHandler('utils.log')
+_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+logger.addHandler(_handler)
+logger.setLevel(logging.WARNING)
+
+# XPath expressions compile to cached C code; build them once at import time
+# instead of resolving namespaces per cell in the row loop.
+_W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+# Fully-qualified tag for iter(): lxml takes the Clark-notation string
+# directly, so no qn()/namespace lookup happens per call.
+_TBL_TAG = '{%s}tbl' % _W
+
+_NS = {'w': _W}
+_TR = etree.XPath('.//w:tr', namespaces=_NS)
+_TC = etree.XPath('./w:tc', namespaces=_NS)
+_TC_TEXT = etree.XPath('.//w:t/text()', namespaces=_NS)
 
 
 class UploadFileAdminMixin(admin.ModelAdmin):
@@ -22,6 +43,9 @@ class UploadFileAdminMixin(admin.ModelAdmin):
     Mixin for adding file upload functionality to the database from the admin panel.
     """
 
+    model_class = None
+    model_importer = None
+
     def get_urls(self):
         urls = super().get_urls()
 
@@ -42,33 +66,23 @@ class UploadFileAdminMixin(admin.ModelAdmin):
 
             if not file.name.endswith('.docx'):
                 messages.error(request, _('The file must be in DOCX format.'))
+                return self.changelist_view(request)
 
-            start_time = time.time()
             try:
-                model_class = getattr(self, 'model_class', None)
-                model_importer = getattr(self, 'model_importer', None)
-
-                processor = model_importer(file, model_class)
-                processor.docx_to_csv()
-
-                end_time = time.time()
-                elapsed_time = end_time - start_time
+                # Large files can take minutes to ingest; store the upload
+                # and hand it to a worker so the request returns immediately.
+                path = default_storage.save(f'uploads/{file.name}', file)
+                model_label = f'{self.model_class._meta.app_label}.{self.model_class.__name__}'
+                importer_path = f'{self.model_importer.__module__}.{self.model_importer.__qualname__}'
 
-                elapsed_time_message = f'{elapsed_time:.2f} seconds'
+                ingest_docx.delay(path, model_label, importer_path)
 
-                messages.success(request,
-                                 _('File successfully uploaded. Processing time: {}').format(elapsed_time_message))
+                messages.success(request, _('File upload queued for processing.'))
 
                 return redirect('admin:%s_%s_changelist' % (self.model._meta.app_label, self.model._meta.model_name))
 
-            except ValueError as ve:
-                messages.error(request, _('Validation error: {}').format(str(ve)))
-
-            except FileNotFoundError:
-                messages.error(request, _('File not found.'))
-
             except Exception as e:
-                messages.error(request, _('Error while updating document: {}').format(str(e)))
+                messages.error(request, _('Error while queueing document upload: {}').format(str(e)))
         else:
             messages.error(request, _('No file selected or an error occurred during upload.'))
 
@@ -80,104 +94,211 @@ class DocxToDB:
     Algorithm for loading data from a DOCX document into the database.
 
     Args:
-        docx_path (str):
-            Path to the DOCX file.
+        docx_path (str or file-like):
+            Path to the DOCX file, or a binary file-like object with its contents.
         model_class (class):
             Django model into which the data will be imported.
         csv_column_count (int):
-            Number of columns in the CSV file.
+            Number of columns expected in each table row.
         mapping (dict, optional):
-            Dictionary for mapping fields from the DOCX file to CSV columns.
+            Dictionary for mapping fields from the DOCX file to row columns.
             If not specified, fields are automatically assigned to columns.
         repeating_value (str, optional):
-            Value for a specific column that repeats in each row of the final CSV.
+            Value for a specific column that repeats in each imported row.
             (Used to ensure that the column does not contain NULL values.)
             Defaults to None.
     """
 
     def __init__(self, docx_path, model_class, csv_column_count, mapping=None, repeating_value=None) -> None:
-        logging.info("Initializing DocxToDB class")
+        logger.info("Initializing DocxToDB class")
         self.docx_document = Document(docx_path)
         self.model_class = model_class
         self.csv_column_count = csv_column_count
         self.mapping = mapping or {}
-        self.document_csv = pd.DataFrame()
-        self.csv_path = None
         self.repeating_value = repeating_value
+        self._mapping_items = sorted(self.mapping.items())
+        self._max_col = max(self.mapping) if self.mapping else -1
 
-    def docx_to_csv(self) -> None:
-        logging.info(f"Start converting DOCX table to database for model {self.model_class.__name__}")
-        logging.info("Converting DOCX table to CSV")
-        self.model_class.objects.all().delete()
+    def run(self) -> None:
+        logger.info(f"Start loading DOCX tables into the database for model {self.model_class.__name__}")
 
         try:
-            with tempfile.NamedTemporaryFile(delete=False, mode='w', newline='', encoding='utf-8',
-                                             suffix='.csv') as temp_file:
-                self.csv_path = temp_file.name
-                writer = csv.writer(temp_file, delimiter=';')
-
-                for table in self.docx_document.tables:
-                    for row in table.rows:
-                        row_data = [cell.text.replace('\n', ' ').strip() for cell in row.cells]
+            rows = self._iter_rows()
+            next(rows, None)  # drop the table header row
+            self.import_to_db(rows)
 
-                        if self.repeating_value is not None:
-                            if row_data[self.repeating_value]:
-                                last_value = row_data[self.repeating_value]
-                            else:
-                                row_data[self.repeating_value] = last_value
+        except Exception as e:
+            logger.error(f"Error during DOCX processing: {str(e)}")
+            raise RuntimeError(f"Error processing DOCX document: {str(e)}")
+
+    def _iter_rows(self):
+        """
+        Yield cleaned, deduplicated rows straight from the parsed tables.
+
+        The rows stream directly into the database import, so no
+        intermediate CSV file is ever written.
+        """
+        seen = set()
+
+        for table_rows in self._parse_tables():
+            for row_data in table_rows:
+                # Header/divider rows collapse to all-empty cells after
+                # strip(); drop them before they reach the repeating-value
+                # fill, the dedup set, or the database.
+                if not any(row_data):
+                    continue
+
+                if self.repeating_value is not None:
+                    if row_data[self.repeating_value]:
+                        last_value = row_data[self.repeating_value]
+                    else:
+                        row_data[self.repeating_value] = last_value
+
+                row_data = row_data[:self.csv_column_count]
+                while len(row_data) < self.csv_column_count:
+                    row_data.append('')
+
+                key = tuple(row_data)
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                yield row_data
+
+    @staticmethod
+    def _parse_table(table) -> list:
+        """
+        Extract the cell text of one w:tbl element as a list of row lists.
+
+        Walks the raw XML instead of python-docx Table/Cell objects: the
+        high-level API rebuilds the row/cell grid on every access, which
+        makes large tables pathologically slow.
+        """
+        return [
+            [
+                ''.join(_TC_TEXT(cell)).replace('\n', ' ').strip()
+                for cell in _TC(row)
+            ]
+            for row in _TR(table)
+        ]
 
-                        row_data = row_data[:self.csv_column_count]
-                        while len(row_data) < self.csv_column_count:
-                            row_data.append('')
+    def _parse_tables(self) -> list:
+        tables = list(self.docx_document.element.body.iter(_TBL_TAG))
 
-                        writer.writerow(row_data)
+        if len(tables) > 1:
+            # lxml releases the GIL during C-level traversal, so tables
+            # can be extracted in parallel; map() preserves document order.
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                return list(executor.map(self._parse_table, tables))
 
-            logging.info("DOCX successfully converted to CSV")
-            self.document_csv = pd.read_csv(self.csv_path, delimiter=';')
-            self.delete_duplicates()
+        return [self._parse_table(table) for table in tables]
 
-        except Exception as e:
-            logging.error(f"Error during DOCX to CSV conversion: {str(e)}")
-            raise RuntimeError(f"Error converting DOCX to CSV: {str(e)}")
-
-    def delete_duplicates(self) -> None:
-        logging.info("Removing duplicate rows from CSV")
-        self.document_csv.drop_duplicates(inplace=True)
-        self.document_csv = self.document_csv.where(pd.notnull(self.document_csv), None)
-        self.document_csv.to_csv(self.csv_path, index=False, encoding="utf-8", sep=';')
-        logging.info("Duplicates removed, proceeding to database import")
-        self.import_to_db()
-
-    def import_to_db(self) -> None:
+    def import_to_db(self, rows) -> None:
         try:
-            logging.info("Starting data import to DB")
-            csv_data = pd.read_csv(self.csv_path, delimiter=';', header=0)
-
-            for _, row in csv_data.iterrows():
-                row_data = {}
-                for col_num, field_name in self.mapping.items():
-                    if col_num < len(row):
-                        value = row[col_num]
-                        value = None if pd.isna(value) else value
-                        row_data[field_name] = value
-
-                if row_data:
-                    self.model_class.objects.create(**row_data)
-
-            logging.info("Data successfully imported into the database")
-            self.cleanup()
+            logger.info("Starting data import to DB")
+
+            if connection.vendor == 'postgresql':
+                self._copy_to_postgres(rows)
+            else:
+                self._bulk_insert(rows)
+
+            logger.info("Data successfully imported into the database")
         except Exception as e:
-            logging.error(f"Error during database import: {str(e)}")
+            logger.error(f"Error during database import: {str(e)}")
             raise RuntimeError(f"Error importing data into the database: {str(e)}")
 
-    def cleanup(self) -> None:
-        if self.csv_path:
-            try:
-                os.remove(self.csv_path)
-                logging.info("Temporary CSV file deleted")
-            except OSError as e:
-                logging.error(f"Error deleting temporary file: {str(e)}")
-                raise RuntimeError(f"Error deleting temporary file: {str(e)}")
+    def _copy_to_postgres(self, rows) -> None:
+        """
+        Stream the rows into Postgres with COPY FROM STDIN, bypassing the
+        ORM and per-row round-trips entirely.
+        """
+        table = self.model_class._meta.db_table
+        columns = ', '.join(field for _, field in self._mapping_items)
+
+        # Project each row through the mapping so the buffer has exactly
+        # the columns named in the COPY statement, mirroring _bulk_insert.
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        writer.writerows(
+            tuple(row[col_num] for col_num, _ in self._mapping_items)
+            for row in rows
+            if len(row) > self._max_col
+        )
+        buffer.seek(0)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # The table is rebuilt from scratch, so maintaining the
+                # secondary indexes row-by-row during COPY is wasted work:
+                # drop them, load, and rebuild them in bulk afterwards.
+                # Only free-standing indexes qualify — Postgres refuses
+                # DROP INDEX on ones that back a PK or UNIQUE constraint.
+                cursor.execute("SET LOCAL synchronous_commit = off")
+                cursor.execute(
+                    "SELECT i.indexname, i.indexdef"
+                    " FROM pg_indexes i"
+                    " JOIN pg_class c ON c.relname = i.indexname"
+                    "  AND c.relnamespace = (SELECT oid FROM pg_namespace WHERE nspname = i.schemaname)"
+                    " JOIN pg_index x ON x.indexrelid = c.oid"
+                    " WHERE i.tablename = %s"
+                    "  AND NOT x.indisprimary"
+                    "  AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = c.oid)",
+                    [table],
+                )
+                indexes = cursor.fetchall()
+
+                for index_name, _unused in indexes:
+                    cursor.execute(f'DROP INDEX "{index_name}"')
+
+                self._truncate_table(cursor)
+                cursor.copy_expert(
+                    f"COPY {table} ({columns}) FROM STDIN WITH CSV DELIMITER ';'",
+                    buffer,
+                )
+
+                for _unused, index_def in indexes:
+                    cursor.execute(index_def)
+
+    def _bulk_insert(self, rows) -> None:
+        """
+        Multi-row INSERT fallback for backends without COPY support.
+
+        Inserts the rows through the raw cursor in one statement batch
+        instead of one ORM create per row.
+        """
+        values = [
+            tuple(row[col_num] if row[col_num] != '' else None
+                  for col_num, _ in self._mapping_items)
+            for row in rows
+            if len(row) > self._max_col
+        ]
+
+        table = self.model_class._meta.db_table
+        columns = ', '.join(field for _, field in self._mapping_items)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                self._truncate_table(cursor)
+
+                placeholders = ', '.join(['%s'] * len(self._mapping_items))
+                cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})',
+                                   values)
+
+    def _truncate_table(self, cursor) -> None:
+        """
+        Empty the target table with raw SQL.
+
+        TRUNCATE is O(1) on Postgres, while objects.all().delete() fetches
+        PKs, runs cascade queries, and fires signals per row. Note that
+        pre_delete/post_delete signals are therefore not sent.
+        """
+        table = self.model_class._meta.db_table
+
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'TRUNCATE TABLE "{table}" RESTART IDENTITY CASCADE')
+        else:
+            # SQLite optimizes an unqualified DELETE into a table clear.
+            cursor.execute(f'DELETE FROM {table}')
 
 # class ImportDocument402n(DocxToDB):
 #     """
@@ -187,7 +308,7 @@ class DocxToDB:
 #     """
 #
 #     def __init__(self, docx_path, model_class) -> None:
-#         logging.info("Initializing ImportDocument402n class")
+#         logger.info("Initializing ImportDocument402n class")
 #         column_mapping = {
 #             0: 'number_402n',
 #             1: 'class_402n',
@@ -201,9 +322,7 @@ class DocxToDB:
 #         super().__init__(docx_path, model_class, csv_column_count=7, mapping=column_mapping,
 #                          repeating_value=repeating_value)
 #
-#     def import_to_db(self) -> None:
-#         logging.info("Additional parsing CSV before import")
-#         parser = MkbRubricsParser(input_file=self.csv_path, output_file='output.csv', row_table=2)
-#         parser.parse()
-#         logging.info("CSV parsed")
-#         super().import_to_db()
+#     def import_to_db(self, rows) -> None:
+#         logger.info("Additional parsing of rows before import")
+#         parser = MkbRubricsParser(row_table=2)
+#         super().import_to_db(parser.parse_row(row) for row in rows)